@@ -9,25 +9,140 @@ This program:
     while analyzing each move for “criticality” (i.e. moves that are effectively forced).
   - SVG images are generated for key positions.
   - A textual explanation of the main ideas/plans is printed.
-  - A command–line spinner (loading animation) gives user feedback during analysis.
+  - Progress dots printed per completed engine search give user feedback during analysis.
   
 Before running:
-  - Install dependencies: pip install python-chess requests
+  - Install dependencies: pip install python-chess "httpx[http2]" numpy numba
   - Download Stockfish 17 (with NNUE enabled) and update `engine_path` accordingly.
 """
 
 import chess
 import chess.engine
 import chess.svg
-import requests
-import threading
-import itertools
-import sys
+import httpx
+import numba
+import numpy as np
+import argparse
+import asyncio
+import os
+import shelve
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Background pool for SVG rendering ---
+# Board images are rendered and written off the analysis path so the next
+# engine search is never blocked on file I/O.
+_SVG_POOL = ThreadPoolExecutor(max_workers=2)
+
+# Positions whose image has already been queued, keyed by transposition key
+# (a tuple of ints read straight from board state — much cheaper than
+# building a FEN string for identity checks).
+_SVG_SEEN = set()
+
+
+def _submit_svg(loop, board, filename):
+    """Queue an SVG render for the position, unless it was already rendered."""
+    key = board._transposition_key()
+    if key in _SVG_SEEN:
+        return
+    _SVG_SEEN.add(key)
+    loop.run_in_executor(_SVG_POOL, generate_position_svg, board.copy(stack=False), filename)
+
+# --- Shared HTTP client for the Lichess API ---
+# A single async client keeps the connection alive between requests, and
+# HTTP/2 multiplexes concurrent lookups over it, so a batch of FEN queries
+# finishes in one round-trip instead of serializing TLS handshakes.
+_CLIENT = httpx.AsyncClient(
+    http2=True,
+    limits=httpx.Limits(max_connections=4, max_keepalive_connections=4),
+    timeout=5,
+)
+
+# --- Shared evaluation cache (position -> engine analysis) ---
+# Positions are immutable, so entries never need invalidation. Keyed on
+# python-chess's internal transposition key (a tuple of ints) rather than
+# FEN, plus the search parameters that shape the result.
+EVAL_CACHE = {}
+
+# --- Transposition memo across variations ---
+# Maps a position's transposition key to the continuation already analyzed
+# from it (remaining move info, final board, explanation), so variations
+# that transpose into one another splice the cached tail instead of
+# re-querying the engine.
+SEEN = {}
+
+
+# Streaming searches stop early once every line reaches this depth; the
+# hard depth cap keeps the engine from searching past what we can use.
+_STREAM_STABLE_DEPTH = 14
+_STREAM_DEPTH_CAP = 18
+
+
+async def _streaming_analyse(board, engine, limit, multipv):
+    """
+    Run an engine search in streaming mode, collecting the latest info per
+    multipv line and stopping as soon as every line has a PV at
+    _STREAM_STABLE_DEPTH — simple positions resolve in a fraction of the
+    time limit instead of always sitting it out.
+    """
+    stream_limit = chess.engine.Limit(time=limit.time, depth=_STREAM_DEPTH_CAP)
+    latest = {}
+    with await engine.analysis(board, stream_limit, multipv=multipv) as analysis:
+        async for info in analysis:
+            if "score" not in info:
+                continue
+            rank = info.get("multipv", 1)
+            if "pv" not in info:
+                # Terminal positions (e.g. checkmate) report a score with no
+                # pv ("info depth 0 score mate 0"); keep such infos as a
+                # fallback so score queries still see the evaluation, but
+                # never let them displace a full line.
+                latest.setdefault(rank, info)
+                continue
+            latest[rank] = info
+            # The engine emits one line per legal move at most, so gate the
+            # early stop on the ranks actually observed — requiring the full
+            # requested width would never trigger in positions with fewer
+            # legal moves than multipv, exactly the simple positions this
+            # cutoff is for. Every rank appears from depth 1 onwards, long
+            # before any of them reaches the stable depth.
+            if latest and all(
+                entry.get("depth", 0) >= _STREAM_STABLE_DEPTH for entry in latest.values()
+            ):
+                break
+    if multipv is None:
+        return latest.get(1, {})
+    return [latest[rank] for rank in sorted(latest)]
+
+
+async def cached_analyse(board, engine, limit, multipv=None):
+    """
+    Run a (streaming) engine analysis, memoizing results in EVAL_CACHE so that
+    positions revisited across variations (or during criticality scoring) are
+    only searched once. Mirrors `engine.analyse`'s contract: a single InfoDict
+    when `multipv` is None, a list of InfoDicts for any explicit width
+    (including 1).
+    """
+    key = (board._transposition_key(), multipv, limit.time)
+    if key in EVAL_CACHE:
+        return EVAL_CACHE[key]
+    result = await _streaming_analyse(board, engine, limit, multipv)
+    # Fail loudly on a shape mismatch rather than letting a caller's blanket
+    # except turn it into a silently truncated analysis.
+    if isinstance(result, dict) != (multipv is None):
+        raise TypeError(f"analysis result shape does not match multipv={multipv!r}: {type(result).__name__}")
+    EVAL_CACHE[key] = result
+    # One dot per real engine search doubles as a progress indicator.
+    print(".", end="", flush=True)
+    return result
+
 
 # --- Dictionary of openings (expand as needed) ---
+# Lines are stored as UCI moves: board.push_uci skips the SAN parsing
+# (regex, disambiguation, legal-move generation) that push_san pays per move.
+# SAN original for reference: d4 Nf6 c4 e6 Nf3 d5 g3 Be7 Bg2 O-O O-O dxc4 Qc2 a6 a4 Nc6 Qxc4 Qd5
 OPENING_DICT = {
-    "catalan": ["d4", "Nf6", "c4", "e6", "Nf3", "d5", "g3", "Be7", "Bg2", "O-O", "0-0", "dxc4", "Qc2", "a6", "a4", "Nc6", "Qxc4", "Qd5"],
+    "catalan": ["d2d4", "g8f6", "c2c4", "e7e6", "g1f3", "d7d5", "g2g3", "f8e7", "f1g2", "e8g8", "e1g1", "d5c4", "d1c2", "a7a6", "a2a4", "b8c6", "c2c4", "d8d5"],
     # Add more openings here…
 }
 
@@ -43,33 +158,87 @@ def get_opening_moves(opening_name):
 
 
 def get_fen_from_moves(moves_list):
-    """Play the given moves (in SAN) on a new board and return the resulting FEN."""
+    """Play the given moves (in UCI) on a new board and return the resulting FEN."""
     board = chess.Board()
     try:
         for move in moves_list:
-            board.push_san(move)
+            board.push_uci(move)
     except Exception as e:
         print(f"Error processing moves {moves_list}: {e}")
         return None
     return board.fen()
 
 
-def query_lichess_openings(fen):
+# Masters database responses are effectively stable for a given position,
+# so cached entries are kept for a month before being refreshed.
+LICHESS_CACHE_FILE = "lichess_cache.db"
+LICHESS_CACHE_MAX_AGE = 30 * 24 * 3600  # seconds
+
+
+def _normalize_fen(fen):
+    """Strip the halfmove/fullmove counters from a FEN (Lichess ignores them)."""
+    return " ".join(fen.split(" ")[:4])
+
+
+# In-memory layer over the disk cache; a plain dict because
+# functools.lru_cache cannot wrap a coroutine.
+_LICHESS_MEM_CACHE = {}
+
+
+async def _fetch_lichess_openings(fen):
+    """
+    Fetch the Masters explorer data for a normalized FEN, consulting the
+    in-memory and on-disk caches first. Raises on network failure so errors
+    are not cached.
+    """
+    if fen in _LICHESS_MEM_CACHE:
+        return _LICHESS_MEM_CACHE[fen]
+
+    try:
+        with shelve.open(LICHESS_CACHE_FILE) as db:
+            entry = db.get(fen)
+            if entry and time.time() - entry["ts"] < LICHESS_CACHE_MAX_AGE:
+                _LICHESS_MEM_CACHE[fen] = entry["data"]
+                return entry["data"]
+    except Exception:
+        pass  # A broken cache file should not prevent the network lookup.
+
+    url = f"https://explorer.lichess.ovh/masters?fen={fen}"
+    response = await _CLIENT.get(url)
+    response.raise_for_status()
+    data = response.json()
+    _LICHESS_MEM_CACHE[fen] = data
+
+    try:
+        with shelve.open(LICHESS_CACHE_FILE) as db:
+            db[fen] = {"ts": time.time(), "data": data}
+    except Exception:
+        pass
+    return data
+
+
+async def query_lichess_openings(fen):
     """
     Query the Lichess Masters opening explorer API for a given FEN.
+    Results are cached in memory and on disk (see LICHESS_CACHE_FILE).
     Documentation: https://explorer.lichess.ovh/
     """
-    url = f"https://explorer.lichess.ovh/masters?fen={fen}"
     try:
-        response = requests.get(url)
-        response.raise_for_status()
-        data = response.json()
-        return data
+        return await _fetch_lichess_openings(_normalize_fen(fen))
     except Exception as e:
         print("Error querying Lichess API:", e)
         return None
 
 
+async def query_lichess_openings_many(fens):
+    """
+    Query the Masters explorer for several FENs concurrently. HTTP/2
+    multiplexes the requests over the shared connection, so a batch costs
+    roughly one round-trip. Returns results in the same order as `fens`.
+    """
+    return await asyncio.gather(*[query_lichess_openings(fen) for fen in fens])
+
+
 def get_top_moves_from_lichess(data, top_n=3):
     """
     From the JSON data returned by the Lichess API,
@@ -86,78 +255,82 @@ def get_top_moves_from_lichess(data, top_n=3):
     return moves_sorted[:top_n]
 
 
-def evaluate_move_criticality(board, move, engine, threshold=50, analysis_time=0.5):
+@numba.njit(cache=True)
+def _criticality_kernel(best_score, alt_scores, threshold):
+    """
+    Max-reduce the alternative scores and classify the move, compiled with
+    Numba. cache=True persists the compilation so the warmup cost is only
+    paid on the first run ever, not per process.
+    """
+    score_diff = best_score - alt_scores.max()
+    return score_diff >= threshold, score_diff
+
+
+# Scratch buffer for legal-move materialization, reused across calls to
+# avoid reallocating a list per ply. Safe to share because the event loop
+# runs evaluate_move_criticality's pre-await section without interleaving.
+_SCRATCH_MOVES = []
+
+
+async def evaluate_move_criticality(board, move, engine, threshold=50, analysis_time=0.5):
     """
     Given a board position (before the move is played) and a candidate move,
     evaluate the move using the engine versus all legal alternatives.
-    
+
     A move is considered “critical” (or an “only move”) if the engine’s evaluation
     drops by at least `threshold` centipawns when choosing any alternative.
-    
+
     Returns a tuple: (is_critical, score_diff)
       - is_critical: True if the move is critical
       - score_diff: the difference in centipawns between the candidate move and its best alternative
     """
-    # Evaluate the candidate move:
-    board.push(move)
+    # A single multipv search scores every legal move at once; the engine's
+    # transposition table makes this far cheaper than analysing each move
+    # in its own search.
+    _SCRATCH_MOVES.clear()
+    _SCRATCH_MOVES.extend(board.legal_moves)
+    multipv = len(_SCRATCH_MOVES)
+    if multipv == 0:
+        return False, 0
+    if multipv == 1:
+        # A sole legal move is the literal "only move": there is no
+        # alternative to measure a score drop against, so classify it as
+        # critical (when it is the candidate) without consulting the engine.
+        return _SCRATCH_MOVES[0] == move, 0
     try:
-        info = engine.analyse(board, chess.engine.Limit(time=analysis_time))
+        infos = await cached_analyse(
+            board,
+            engine,
+            chess.engine.Limit(time=analysis_time),
+            multipv=multipv,
+        )
     except Exception:
-        info = {"score": chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE)}
-    score_obj = info["score"].white()  # Evaluation from White’s perspective
-    best_score = score_obj.score(mate_score=10000)  # in centipawns
-    board.pop()
-
-    # Evaluate every legal alternative move in the current position:
-    alternative_scores = []
-    for alt in board.legal_moves:
-        board.push(alt)
-        try:
-            info_alt = engine.analyse(board, chess.engine.Limit(time=analysis_time))
-        except Exception:
-            info_alt = {"score": chess.engine.PovScore(chess.engine.Cp(0), chess.WHITE)}
-        alt_score_obj = info_alt["score"].white()
-        alt_score = alt_score_obj.score(mate_score=10000)
-        alternative_scores.append((alt, alt_score))
-        board.pop()
-
-    # Exclude the candidate move from alternatives:
-    alternative_scores = [(m, s) for (m, s) in alternative_scores if m != move]
-    if not alternative_scores:
         return False, 0
 
-    best_alternative = max(s for m, s in alternative_scores)
-    score_diff = best_score - best_alternative
-
-    is_critical = score_diff >= threshold
-    return is_critical, score_diff
-
-
-# --- Spinner class for loading animation ---
-class Spinner:
-    def __init__(self, message="Loading "):
-        self.message = message
-        self.done = False
-        self.thread = threading.Thread(target=self.spin)
-
-    def spin(self):
-        for c in itertools.cycle(['|', '/', '-', '\\']):
-            if self.done:
-                break
-            sys.stdout.write('\r' + self.message + c)
-            sys.stdout.flush()
-            time.sleep(0.1)
-        sys.stdout.write('\r')
-
-    def start(self):
-        self.thread.start()
+    # Single pass over the multipv entries: pick out the candidate's score and
+    # gather the alternatives into a NumPy array so the max-reduction is a
+    # single vectorized op rather than Python-level comparisons.
+    best_score = None
+    alt_scores = []
+    for info in infos:
+        pv = info.get("pv")
+        if not pv:
+            continue
+        score = info["score"].white().score(mate_score=10000)  # in centipawns
+        if pv[0] == move:
+            best_score = score
+        else:
+            alt_scores.append(score)
+
+    if best_score is None or not alt_scores:
+        return False, 0
 
-    def stop(self):
-        self.done = True
-        self.thread.join()
+    alts = np.fromiter(alt_scores, dtype=np.int32, count=len(alt_scores))
+    is_critical, score_diff = _criticality_kernel(np.int32(best_score), alts, np.int32(threshold))
+    return bool(is_critical), int(score_diff)
 
 
-def get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5):
+async def get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5):
     """
     From the given board position, get candidate moves.
     First, attempt to use the Lichess Masters database; if fewer than
@@ -166,7 +339,7 @@ def get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5
     """
     candidate_moves = []
     fen = board.fen()
-    data = query_lichess_openings(fen)
+    data = await query_lichess_openings(fen)
     if data and "moves" in data:
         moves = data["moves"]
         sorted_moves = sorted(
@@ -185,7 +358,7 @@ def get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5
     # If not enough candidates, ask the engine.
     if len(candidate_moves) < top_moves_count:
         try:
-            infos = engine.analyse(board, chess.engine.Limit(time=analysis_time), multipv=top_moves_count)
+            infos = await cached_analyse(board, engine, chess.engine.Limit(time=analysis_time), multipv=top_moves_count)
             for info in infos:
                 pv = info.get("pv")
                 if pv and pv[0] not in candidate_moves:
@@ -195,17 +368,29 @@ def get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5
     return candidate_moves[:top_moves_count]
 
 
-def generate_plan_explanation(board, engine, analysis_time=0.5):
+# Centipawn scores of explained final positions, keyed by transposition key
+# and time budget. Variations often end on the same position (or one scored
+# earlier), and an lru_cache cannot take the engine as an argument, so a
+# plain dict in the style of EVAL_CACHE serves as the memo.
+_PLAN_SCORE_CACHE = {}
+
+
+async def generate_plan_explanation(board, engine, analysis_time=0.5):
     """
     Generate a simple textual explanation of the main ideas/plans for both sides.
     This example uses a basic evaluation heuristic.
     """
-    try:
-        info = engine.analyse(board, chess.engine.Limit(time=analysis_time))
-        score_obj = info["score"].white()
-        score = score_obj.score(mate_score=10000)
-    except Exception:
-        score = None
+    key = (board._transposition_key(), analysis_time)
+    if key in _PLAN_SCORE_CACHE:
+        score = _PLAN_SCORE_CACHE[key]
+    else:
+        try:
+            info = await cached_analyse(board, engine, chess.engine.Limit(time=analysis_time))
+            score_obj = info["score"].white()
+            score = score_obj.score(mate_score=10000)
+        except Exception:
+            score = None
+        _PLAN_SCORE_CACHE[key] = score
 
     if score is None:
         explanation = ("The position is unclear. Both sides should focus on completing development "
@@ -244,79 +429,137 @@ def generate_position_svg(board, filename="board.svg"):
         print("Error saving SVG:", e)
 
 
-def analyze_variation(start_board, candidate_move, engine, variation_depth=5, analysis_time=0.5, threshold=50):
+async def analyze_variation(start_board, candidate_move, engine, variation_depth=5, analysis_time=0.5, threshold=50, generate_svgs=False):
     """
     Analyze a variation starting with candidate_move from start_board, going variation_depth moves deep.
     For each move in the variation, determine if it is a "critical" (only) move.
-    An SVG image is generated after each move.
-    
+    If `generate_svgs` is set, an SVG image is generated after each move (on a
+    worker thread, so the rendering and file I/O overlap with the next engine
+    search).
+
     Returns a dictionary with:
-      - "moves": list of SAN moves in the variation,
-      - "critical_info": list of tuples (move_san, is_critical, score_diff) for each move,
+      - "moves": list of UCI moves in the variation (SAN is only computed
+        once for the final printout — board.san() regenerates all legal
+        moves for disambiguation, which is too expensive for the hot loop),
+      - "critical_info": list of tuples (move_uci, is_critical, score_diff) for each move,
       - "critical_count": total number of critical moves,
+      - "max_score_diff"/"mean_score_diff": score-diff statistics over the line,
       - "final_board": the board position reached,
       - "explanation": a textual explanation of the main ideas/plans.
     """
-    move_info_list = []  # List to store (move_san, is_critical, score_diff) tuples.
-    board = start_board.copy()
+    move_info_list = []  # List to store (move_uci, is_critical, score_diff) tuples.
+    # The caller's move stack is irrelevant here, so skip copying it.
+    board = start_board.copy(stack=False)
+    loop = asyncio.get_running_loop()
 
     # Evaluate the candidate move for criticality before playing it.
     try:
-        is_crit, score_diff = evaluate_move_criticality(board, candidate_move, engine, threshold, analysis_time)
+        is_crit, score_diff = await evaluate_move_criticality(board, candidate_move, engine, threshold, analysis_time)
     except Exception:
         is_crit, score_diff = False, 0
 
-    try:
-        candidate_san = board.san(candidate_move)
-    except Exception:
-        candidate_san = str(candidate_move)
-    move_info_list.append((candidate_san, is_crit, score_diff))
-    
+    candidate_uci = candidate_move.uci()
+    move_info_list.append((candidate_uci, is_crit, score_diff))
+
     # Play the candidate move and generate an SVG image.
     board.push(candidate_move)
-    svg_filename = f"variation_{candidate_san}_step_1.svg"
-    generate_position_svg(board, svg_filename)
+    if generate_svgs:
+        svg_filename = f"variation_{candidate_uci}_step_1.svg"
+        _submit_svg(loop, board, svg_filename)
 
     # Follow the engine’s principal variation for subsequent moves.
+    # A single multipv search yields both the best move (rank 1's pv) and the
+    # scores needed for criticality (rank 1 vs rank 2), instead of one search
+    # for the PV and a second one inside evaluate_move_criticality.
+    explanation = None
+    visited = []  # (transposition_key, index of first continuation entry)
     for i in range(1, variation_depth):
+        zkey = board._transposition_key()
+        cached = SEEN.get(zkey)
+        if cached is not None:
+            # Another variation already continued from this position; splice
+            # its tail instead of re-running the engine.
+            move_info_list.extend(cached["continuation"])
+            explanation = cached["explanation"]
+            board = cached["final_board"]
+            break
+        visited.append((zkey, len(move_info_list)))
         try:
-            info = engine.analyse(board, chess.engine.Limit(time=analysis_time))
-            pv = info.get("pv")
-            if not pv or len(pv) == 0:
+            infos = await cached_analyse(board, engine, chess.engine.Limit(time=analysis_time), multipv=20)
+            if not infos or not infos[0].get("pv"):
                 break
-            next_move = pv[0]
-            # Evaluate criticality of the next move from the current board position.
-            is_crit, score_diff = evaluate_move_criticality(board, next_move, engine, threshold, analysis_time)
-            try:
-                next_move_san = board.san(next_move)
-            except Exception:
-                next_move_san = str(next_move)
-            move_info_list.append((next_move_san, is_crit, score_diff))
+            next_move = infos[0]["pv"][0]
+            # Criticality: how much worse is the second-best move?
+            if len(infos) > 1 and infos[1].get("pv"):
+                best_score = infos[0]["score"].white().score(mate_score=10000)
+                second_score = infos[1]["score"].white().score(mate_score=10000)
+                score_diff = best_score - second_score
+                is_crit = score_diff >= threshold
+            else:
+                is_crit, score_diff = False, 0
+            move_info_list.append((next_move.uci(), is_crit, score_diff))
             board.push(next_move)
-            svg_filename = f"variation_{candidate_san}_step_{i+1}.svg"
-            generate_position_svg(board, svg_filename)
+            if generate_svgs:
+                svg_filename = f"variation_{candidate_uci}_step_{i+1}.svg"
+                _submit_svg(loop, board, svg_filename)
         except Exception:
             break
 
-    # Count total number of critical moves.
-    critical_count = sum(1 for _, is_crit, _ in move_info_list if is_crit)
-
-    # Generate an explanation for the final position.
-    explanation = generate_plan_explanation(board, engine, analysis_time)
+    # One vectorized pass over the variation's criticality data: critical
+    # count plus score-diff statistics for the summary.
+    crit_arr = np.array(
+        [(score_diff, is_crit) for _, is_crit, score_diff in move_info_list],
+        dtype=[("diff", "i4"), ("crit", "?")],
+    )
+    critical_count = int(crit_arr["crit"].sum())
+    max_score_diff = int(crit_arr["diff"].max()) if len(crit_arr) else 0
+    mean_score_diff = float(crit_arr["diff"].mean()) if len(crit_arr) else 0.0
+
+    # Generate an explanation for the final position (unless it came from
+    # a spliced transposition, which already carries one).
+    if explanation is None:
+        explanation = await generate_plan_explanation(board, engine, analysis_time)
+
+    # Record the continuation from every position we visited, so later
+    # variations that transpose into this line can reuse it.
+    for pos_key, start in visited:
+        SEEN[pos_key] = {
+            "continuation": move_info_list[start:],
+            "explanation": explanation,
+            "final_board": board,
+        }
     return {
         "moves": [m for m, _, _ in move_info_list],
         "critical_info": move_info_list,
         "critical_count": critical_count,
+        "max_score_diff": max_score_diff,
+        "mean_score_diff": mean_score_diff,
         "final_board": board,
         "explanation": explanation
     }
 
 
-def main():
+async def main_async(generate_svgs=False):
+    # Every exit path — early returns included — must still close the shared
+    # HTTP client and drain the SVG pool, so the analysis body is wrapped
+    # rather than cleaning up only on the happy path.
+    try:
+        await _run_analysis(generate_svgs)
+    finally:
+        await _CLIENT.aclose()
+        # Make sure all queued board images have hit the disk before exiting.
+        _SVG_POOL.shutdown(wait=True)
+
+
+async def _run_analysis(generate_svgs=False):
     # --- 1. START THE ENGINE ---
     engine_path = "./../../../Stockfish-master/src/stockfish"  # Adjust this path to your Stockfish 17 (with NNUE)
     try:
-        engine = chess.engine.SimpleEngine.popen_uci(engine_path)
+        transport, engine = await chess.engine.popen_uci(engine_path)
+        # Default Stockfish settings (1 thread, 16MB hash) leave the internal
+        # transposition table far too small for repeated analysis of related
+        # positions; give the primary engine the full machine.
+        await engine.configure({"Threads": os.cpu_count() or 4, "Hash": 1024})
     except Exception as e:
         print("Error starting Stockfish engine:", e)
         return
@@ -325,49 +568,86 @@ def main():
     opening_name = input("Enter the opening name (e.g. 'Catalan'): ")
     opening_moves = get_opening_moves(opening_name)
     if not opening_moves:
-        engine.quit()
+        await engine.quit()
         return
 
     print(f"Using opening line: {opening_moves}")
     board = chess.Board()
     for move in opening_moves:
         try:
-            board.push_san(move)
+            board.push_uci(move)
         except Exception as e:
             print(f"Error processing move {move}: {e}")
-            engine.quit()
+            await engine.quit()
             return
 
     print("Completed opening line.")
     print("Current position FEN:", board.fen())
-    generate_position_svg(board, "opening_line_position.svg")
+    if generate_svgs:
+        generate_position_svg(board, "opening_line_position.svg")
 
     # --- 3. FETCH VARIATION CANDIDATES ---
     print("\nFetching candidate moves for variations from the current position...")
-    candidates = get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5)
+    candidates = await get_variation_candidates(board, engine, top_moves_count=3, analysis_time=0.5)
     if not candidates:
         print("No candidate moves found for variations.")
-        engine.quit()
+        await engine.quit()
         return
 
-    # --- 4. ANALYZE EACH VARIATION (with spinner feedback) ---
+    # --- 4. ANALYZE THE VARIATIONS IN PARALLEL ---
+    # Stockfish is the bottleneck, so give each variation its own engine
+    # process (one search thread each) and analyze them concurrently.
     variation_depth = 5
-    variations = []
-    for idx, candidate in enumerate(candidates, start=1):
+    variation_engines = []
+    # Split the cores between the concurrent engines so they don't contend.
+    threads_per_engine = max(1, (os.cpu_count() or 4) // len(candidates))
+    try:
+        for _ in candidates:
+            _, var_engine = await chess.engine.popen_uci(engine_path)
+            await var_engine.configure({"Threads": threads_per_engine, "Hash": 512})
+            variation_engines.append(var_engine)
+    except Exception as e:
+        print("Error starting engines for variation analysis:", e)
+        for var_engine in variation_engines:
+            await var_engine.quit()
+        await engine.quit()
+        return
+
+    candidate_sans = []
+    for candidate in candidates:
+        try:
+            candidate_sans.append(board.san(candidate))
+        except Exception:
+            candidate_sans.append(str(candidate))
+    print(f"\nAnalyzing {len(candidates)} variations in parallel: {', '.join(candidate_sans)}")
+
+    # Progress dots are emitted by cached_analyse as engine searches finish,
+    # so feedback reflects real work instead of a timer-driven spinner.
+    print("Analyzing variations ", end="", flush=True)
+    try:
+        variations = await asyncio.gather(*[
+            analyze_variation(board, candidate, variation_engines[i],
+                              variation_depth, 0.5, 50, generate_svgs)
+            for i, candidate in enumerate(candidates)
+        ])
+    finally:
+        print()  # Terminate the progress-dot line.
+        for var_engine in variation_engines:
+            await var_engine.quit()
+
+    for idx, var_analysis in enumerate(variations, start=1):
+        # The analysis records moves as UCI; convert to SAN once here by
+        # replaying the line on a scratch board.
         try:
-            candidate_san = board.san(candidate)
+            scratch = board.copy(stack=False)
+            sans = [scratch.san_and_push(chess.Move.from_uci(u)) for u in var_analysis["moves"]]
         except Exception:
-            candidate_san = str(candidate)
-        print(f"\nAnalyzing variation {idx} starting with move: {candidate_san}")
-        spinner = Spinner(message="Analyzing variation... ")
-        spinner.start()
-        var_analysis = analyze_variation(board, candidate, engine, variation_depth, analysis_time=0.5, threshold=50)
-        spinner.stop()
-        variations.append(var_analysis)
-        print(f"Variation {idx} moves: {' '.join(var_analysis['moves'])}")
+            sans = list(var_analysis["moves"])
+        var_analysis["moves_san"] = sans
+        print(f"\nVariation {idx} moves: {' '.join(sans)}")
         print(f"Critical moves in this variation: {var_analysis['critical_count']}")
         # Print detailed criticality info for each move.
-        for move_san, is_crit, score_diff in var_analysis['critical_info']:
+        for move_san, (_, is_crit, score_diff) in zip(sans, var_analysis['critical_info']):
             crit_msg = "CRITICAL" if is_crit else "Flexible"
             print(f"  Move {move_san}: {crit_msg} (score diff ≈ {score_diff} centipawns)")
         print("Explanation:", var_analysis["explanation"])
@@ -375,13 +655,27 @@ def main():
     # --- 5. SUMMARY OF VARIATIONS ---
     print("\nSummary of analyzed variations:")
     for idx, var in enumerate(variations, start=1):
-        moves_line = ' '.join(var["moves"])
+        moves_line = ' '.join(var["moves_san"])
         print(f"Variation {idx}: {moves_line}")
         print(f"Total critical moves: {var['critical_count']}")
+        print(f"Score diffs: max {var['max_score_diff']}, mean {var['mean_score_diff']:.1f} centipawns")
         print("Explanation:", var["explanation"])
         print("-" * 40)
 
-    engine.quit()
+    await engine.quit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Explore chess opening variations and their critical moves.")
+    parser.add_argument(
+        "--svg",
+        action="store_true",
+        help="generate SVG images of key positions (skipped by default)",
+    )
+    args = parser.parse_args()
+
+    asyncio.set_event_loop_policy(chess.engine.EventLoopPolicy())
+    asyncio.run(main_async(generate_svgs=args.svg))
 
 
 if __name__ == "__main__":